@@ -1,18 +1,26 @@
 import argparse
+import asyncio
+import base64
+from contextlib import contextmanager
 from datetime import datetime
-from email.mime.application import MIMEApplication
+from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import logging
 import os
 import shutil
 import smtplib
-from typing import List, Optional
+from typing import Iterator, List, Set
 import zipfile
 from zoneinfo import ZoneInfo
 
-from playwright.sync_api import sync_playwright, ViewportSize, Page, Locator
-from PIL import Image
+from playwright.async_api import (
+    async_playwright,
+    Locator,
+    Page,
+    TimeoutError as PlaywrightTimeoutError,
+    ViewportSize,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,9 +49,18 @@ def parse_args():
         "--temp-dir", help="临时目录路径，默认为脚本目录下的 temp/send_daily_report"
     )
 
+    # 浏览器用户目录（可选），每次运行不会被清理
+    parser.add_argument(
+        "--profile-dir",
+        help="浏览器用户目录路径，默认为脚本目录下的 temp/send_daily_report_profile",
+    )
+
     return parser.parse_args()
 
 
+# 报表日期使用的时区
+SH_TZ = ZoneInfo("Asia/Shanghai")
+
 # 获取脚本所在目录
 CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
 
@@ -58,172 +75,337 @@ CJPLUS_REPORTS = [
     {"name": "长嘉出货报表", "page": 205, "has_tail": True},
 ]
 
+# 用于探测登录态的报表页（首个公司出货报表，已登录时显示数据表格）
+LOGIN_PROBE_PAGE = next(r["page"] for r in CJPLUS_REPORTS if "has_tail" in r)
+
+# 获取表格中各数据 tbody 的内容，用于判断年份切换后表格是否已刷新
+TBODY_CONTENT_JS = """
+    () => Array.from(
+        document.querySelectorAll("tbody[data-type]"), el => el.outerHTML
+    ).join("")
+"""
+
+# 并发截图的页面数
+SCREENSHOT_WORKERS = 4
+
+# 附件编码时每次读取的字节数（57 的整数倍，保证 base64 分行与整体编码一致）
+ATTACHMENT_CHUNK_SIZE = 57 * 2048
+
+# 截图无需加载的图片、字体、音视频资源扩展名
+BLOCKED_EXTENSIONS = (
+    "png",
+    "jpg",
+    "jpeg",
+    "gif",
+    "webp",
+    "svg",
+    "ico",
+    "woff",
+    "woff2",
+    "ttf",
+    "otf",
+    "eot",
+    "mp3",
+    "mp4",
+)
+
+# 无条件拦截的第三方统计、字体服务
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "hm.baidu.com",
+)
 
-def screenshot(base_url: str, username: str, password: str, temp_dir: str):
+# 交给浏览器拦截的 URL 通配符（带或不带查询参数）
+BLOCKED_URL_PATTERNS = [
+    *(f"*.{ext}{suffix}" for ext in BLOCKED_EXTENSIONS for suffix in ("", "?*")),
+    *(f"*://*{host}/*" for host in BLOCKED_HOSTS),
+]
+
+
+async def screenshot(
+    base_url: str, username: str, password: str, temp_dir: str, profile_dir: str
+) -> List[str]:
     """截取图片"""
-    img_paths = []
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True)
-        logging.info("启动浏览器")
-
-        viewport = ViewportSize(width=1920, height=1080)
-        context = browser.new_context(viewport=viewport)
-        logging.info("创建上下文")
-
-        page = context.new_page()
-        logging.info("创建新页面")
-
-        # 登录后台
-        page.goto(base_url, wait_until="networkidle", timeout=30_000)
-        page.wait_for_selector('input[name="user"]', timeout=5_000)
-        logging.info("已加载登录页面")
-
-        page.fill('input[name="user"]', username)
-        page.fill('input[name="pass"]', password)
-        page.click('input[type="submit"]')
-        page.wait_for_load_state("networkidle", timeout=30_000)
-        logging.info("已成功登录后台")
-
-        # 处理每个报表
-        for report in CJPLUS_REPORTS:
-            url = f"{base_url}/utl/{report['page']}/{report['page']}.php"
-            logging.info(f'处理报表：{report["name"]} - {url}')
-
-            if report["name"] == "今日新单报表":
-                img_path = __screenshot_new_order_report(page, url, temp_dir)
-            elif report["name"] == "延期出货明细表":
-                img_path = __screenshot_delay_shipment_report(page, url, temp_dir)
-            else:
-                img_path = __screenshot_company_shipment_report(
-                    page, url, report["name"], report.get("has_tail", False), temp_dir
+    viewport = ViewportSize(width=1920, height=1080)
+    now = datetime.now(SH_TZ)
+
+    async with async_playwright() as pw:
+        # 使用持久化的用户目录，跨次运行保留登录态和 HTTP 缓存
+        context = await pw.chromium.launch_persistent_context(
+            user_data_dir=profile_dir, headless=True, viewport=viewport
+        )
+        logging.info(f"启动浏览器，用户目录：{profile_dir}")
+
+        page = context.pages[0] if context.pages else await context.new_page()
+        await __block_resources(page)
+        await __login(page, base_url, username, password)
+
+        # 在同一个浏览器上下文中开启多个页面，共享登录态和缓存，并发截取报表
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(CJPLUS_REPORTS):
+            queue.put_nowait(item)
+        img_paths = [""] * len(CJPLUS_REPORTS)
+
+        async def worker():
+            worker_page = await context.new_page()
+            await __block_resources(worker_page)
+            while not queue.empty():
+                index, report = queue.get_nowait()
+                img_paths[index] = await __screenshot_report(
+                    worker_page, base_url, report, now, temp_dir
                 )
+            await worker_page.close()
 
-            img_paths.append(img_path)
-            logging.info(f"已完成截图：{img_path}")
+        workers = min(SCREENSHOT_WORKERS, len(CJPLUS_REPORTS))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        await context.close()
 
     return img_paths
 
 
-def __screenshot_new_order_report(page: Page, url: str, temp_dir: str) -> str:
+async def __login(page: Page, base_url: str, username: str, password: str):
+    """确保已登录后台，以报表页的数据表格作为已登录的标志"""
+    probe_url = f"{base_url}/utl/{LOGIN_PROBE_PAGE}/{LOGIN_PROBE_PAGE}.php"
+
+    # 打开报表页，等到出现数据表格（已登录）或登录表单（未登录）再判断
+    await page.goto(probe_url, wait_until="domcontentloaded", timeout=30_000)
+    try:
+        await page.wait_for_selector(
+            'table, input[name="user"]', state="visible", timeout=30_000
+        )
+    except PlaywrightTimeoutError:
+        pass
+    login_form = page.locator('input[name="user"]')
+    if await login_form.count() == 0 and await page.locator("table").count() > 0:
+        logging.info("登录态仍有效，跳过登录")
+        return
+
+    # 报表页未跳转到登录表单时，回到首页登录
+    if await login_form.count() == 0:
+        await page.goto(base_url, wait_until="domcontentloaded", timeout=30_000)
+        await page.wait_for_selector('input[name="user"]', timeout=30_000)
+    logging.info("已加载登录页面")
+
+    await page.fill('input[name="user"]', username)
+    await page.fill('input[name="pass"]', password)
+    async with page.expect_navigation(wait_until="load", timeout=30_000):
+        await page.click('input[type="submit"]')
+
+    # 提交后的页面仍是登录表单，说明用户名或密码有误
+    if await login_form.count() > 0:
+        raise RuntimeError("登录 CJPLUS 失败，请检查用户名和密码")
+    logging.info("已成功登录后台")
+
+
+async def __screenshot_report(
+    page: Page, base_url: str, report: dict, now: datetime, temp_dir: str
+) -> str:
+    """截取单个报表"""
+    url = f"{base_url}/utl/{report['page']}/{report['page']}.php"
+    logging.info(f'处理报表：{report["name"]} - {url}')
+
+    if report["name"] == "今日新单报表":
+        img_path = await __screenshot_new_order_report(page, url, now, temp_dir)
+    elif report["name"] == "延期出货明细表":
+        img_path = await __screenshot_delay_shipment_report(page, url, now, temp_dir)
+    else:
+        img_path = await __screenshot_company_shipment_report(
+            page,
+            url,
+            report["name"],
+            report.get("has_tail", False),
+            now,
+            temp_dir,
+        )
+
+    logging.info(f"已完成截图：{img_path}")
+    return img_path
+
+
+async def __block_resources(page: Page):
+    """拦截图片、字体及第三方统计等与表格截图无关的请求
+
+    由浏览器按 URL 直接拦截，不经 Playwright 路由，因而不会关闭 HTTP 缓存
+    """
+    cdp = await page.context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+async def __screenshot_new_order_report(
+    page: Page, url: str, now: datetime, temp_dir: str
+) -> str:
     """截取「今日新单报表」"""
-    page.goto(url, wait_until="networkidle", timeout=60_000)
-    page.wait_for_selector("#table", state="visible", timeout=5_000)
+    await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+    await page.wait_for_selector("#table", state="visible", timeout=60_000)
     logging.info("已加载数据表格页")
 
-    today = datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d")
+    today = now.strftime("%Y-%m-%d")
     img_path = os.path.join(temp_dir, f"今日新单报表_{today}.png")
-    page.locator("#table").screenshot(path=img_path)
+    await page.locator("#table").screenshot(path=img_path)
     logging.info(f"已截取数据表格页：{img_path}")
 
     return img_path
 
 
-def __screenshot_delay_shipment_report(page: Page, url: str, temp_dir: str) -> str:
+async def __screenshot_delay_shipment_report(
+    page: Page, url: str, now: datetime, temp_dir: str
+) -> str:
     """截取「延期出货明细表」"""
-    page.goto(url, wait_until="networkidle", timeout=30_000)
-    page.wait_for_selector("#table", state="visible", timeout=5_000)
+    await page.goto(url, wait_until="domcontentloaded", timeout=30_000)
+    await page.wait_for_selector("#table", state="visible", timeout=30_000)
     logging.info("已加载数据表格页")
 
-    page.locator("#header").evaluate("el => el.style.display = 'none'")
+    await page.locator("#header").evaluate("el => el.style.display = 'none'")
     logging.info("已隐藏顶部表单")
 
-    today = datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d")
+    today = now.strftime("%Y-%m-%d")
     img_path = os.path.join(temp_dir, f"延期出货明细表_{today}.png")
 
-    page.locator("#table").screenshot(path=img_path)
+    await page.locator("#table").screenshot(path=img_path)
     logging.info(f"已截取数据表格页：{img_path}")
 
     return img_path
 
 
-def __screenshot_company_shipment_report(
-    page: Page, url: str, report: str, has_tail: bool, temp_dir: str
+async def __screenshot_company_shipment_report(
+    page: Page, url: str, report: str, has_tail: bool, now: datetime, temp_dir: str
 ) -> str:
     """截取「公司出货报表」"""
 
-    img_paths = []  # 局部截图
-    now = datetime.now(ZoneInfo("Asia/Shanghai"))
-
-    # 加载数据表格页
-    page.goto(url, wait_until="networkidle", timeout=30_000)
-    page.wait_for_selector("table", state="visible", timeout=5_000)
-    logging.info("已加载数据表格页")
-
-    # 截取表头
-    img_path = os.path.join(temp_dir, f"{report}_局部截图-表头.png")
-    page.locator("thead").screenshot(path=img_path)
-    img_paths.append(img_path)
-    logging.info(f"已截取表头：{img_path}")
-
-    # 截取延期出货
-    img_path = os.path.join(temp_dir, f"{report}_局部截图-延期出货.png")
-    page.locator('tbody[data-type="延期出货"]').screenshot(path=img_path)
-    img_paths.append(img_path)
-    logging.info(f"已截取延期出货：{img_path}")
-
-    # 截取货尾
-    if has_tail:
-        img_path = os.path.join(temp_dir, f"{report}_局部截图-货尾.png")
-        page.locator('tbody[data-type="货尾"]').screenshot(path=img_path)
-        img_paths.append(img_path)
-        logging.info(f"已截取货尾：{img_path}")
-
-    # 截取月份数据
-    for i in range(now.month, min(now.month + 3, 13)):
-        css_locator = f'tbody[data-type="{i} 月"]'
-        if page.locator(css_locator).count() == 0:
-            __append_blank_month_tbody(page.locator("table"), i)
-            logging.info(f"添加空白的 {i} 月数据")
-        img_path = os.path.join(temp_dir, f"{report}_局部截图-{i} 月.png")
-        page.locator(css_locator).screenshot(path=img_path)
-        img_paths.append(img_path)
-        logging.info(f"已截取 {i} 月数据：{img_path}")
-
-    # 处理跨年数据
-    if now.month > 10:
-        logging.info(f"当前月份 {now.month} > 10，需截取 {now.year + 1} 年 1、2 月数据")
-        page.click('input[name="年份"]', timeout=10_000)
-        page.click(f'li[lay-ym="{now.year + 1}"]', timeout=10_000)
-        page.wait_for_load_state("networkidle", timeout=30_000)
-        page.wait_for_selector("table", state="visible", timeout=10_000)
-
-        for i in range(1, 3):
-            css_locator = f'tbody[data-type="{i} 月"]'
-            if page.locator(css_locator).count() == 0:
-                __append_blank_month_tbody(page.locator("table"), i)
-                logging.info(f"添加空白的 {i} 月数据")
-            img_path = os.path.join(temp_dir, f"{report}_局部截图-{i} 月.png")
-            page.locator(css_locator).screenshot(path=img_path)
-            img_paths.append(img_path)
-
-    # 确定合并顺序
+    # 确定需要展示的月份（由远及近）
     if now.month < 11:
-        months = range(now.month + 2, now.month - 1, -1)
+        months = list(range(now.month + 2, now.month - 1, -1))
     elif now.month == 11:
         months = [1, 12, 11]
     else:
         months = [2, 1, 12]
 
-    merge_order = [
-        os.path.join(temp_dir, f"{report}_局部截图-表头.png"),
-        os.path.join(temp_dir, f"{report}_局部截图-延期出货.png"),
-    ]
+    # 加载数据表格页，等数据 tbody 渲染完成后再读取
+    await page.goto(url, wait_until="domcontentloaded", timeout=30_000)
+    await page.wait_for_selector(
+        'tbody[data-type="延期出货"]', state="visible", timeout=30_000
+    )
+    if has_tail:
+        await page.wait_for_selector(
+            'tbody[data-type="货尾"]', state="visible", timeout=30_000
+        )
+    logging.info("已加载数据表格页")
+
+    # 处理跨年数据：先保存当年的表头和数据，切换到下一年取出 1、2 月数据后，
+    # 再把当年的部分放回表格，无需重新加载页面
+    table = page.locator("table")
+    if now.month > 10:
+        logging.info(f"当前月份 {now.month} > 10，需截取 {now.year + 1} 年 1、2 月数据")
+        current_year = await table.evaluate(
+            """
+                table => ({
+                    thead: table.tHead?.outerHTML ?? "",
+                    tbodies: Array.from(
+                        table.querySelectorAll("tbody[data-type]"), el => el.outerHTML
+                    ),
+                })
+            """
+        )
+
+        # 记录当前年份的表格内容，切换后据此判断表格是否已换成下一年的数据
+        before = await page.evaluate(TBODY_CONTENT_JS)
+        await page.click('input[name="年份"]', timeout=10_000)
+        await page.click(f'li[lay-ym="{now.year + 1}"]', timeout=10_000)
+
+        # 年份已切换且表格内容已变化（无论是局部刷新还是整页跳转）
+        await page.wait_for_function(
+            f"""
+                ([year, before]) => {{
+                    const input = document.querySelector('input[name="年份"]');
+                    return input?.value === year
+                        && document.querySelector('tbody[data-type="延期出货"]')
+                        && ({TBODY_CONTENT_JS})() !== before;
+                }}
+            """,
+            arg=[str(now.year + 1), before],
+            timeout=30_000,
+        )
+
+        # 只保留下一年的 1、2 月数据，其余换回当年的表头和数据
+        next_year_types = await table.evaluate(
+            """
+                (table, current) => {
+                    const nextYear = Array.from(table.querySelectorAll(
+                        'tbody[data-type="1 月"], tbody[data-type="2 月"]'
+                    ));
+                    table.querySelectorAll("tbody[data-type]").forEach(el => {
+                        el.remove();
+                    });
+                    if (current.thead && table.tHead) {
+                        table.tHead.outerHTML = current.thead;
+                    }
+                    for (const html of current.tbodies) {
+                        table.insertAdjacentHTML("beforeend", html);
+                    }
+                    table.querySelectorAll(
+                        'tbody[data-type="1 月"], tbody[data-type="2 月"]'
+                    ).forEach(el => el.remove());
+                    nextYear.forEach(el => table.appendChild(el));
+                    return nextYear.map(el => el.dataset.type);
+                }
+            """,
+            arg=current_year,
+        )
+        logging.info(f"已取出 {now.year + 1} 年数据：{next_year_types}")
+
+    # 补齐缺失的月份数据
+    existing_types = await __tbody_types(page)
+    for i in months:
+        if f"{i} 月" not in existing_types:
+            await __append_blank_month_tbody(table, i)
+            logging.info(f"添加空白的 {i} 月数据")
+
+    # 按顺序排列需要的数据，隐藏其余部分，整表一次截图
+    keep_types = ["延期出货"]
     if has_tail:
-        merge_order.append(os.path.join(temp_dir, f"{report}_局部截图-货尾.png"))
-    merge_order += [
-        os.path.join(temp_dir, f"{report}_局部截图-{m} 月.png") for m in months
-    ]
-    logging.info(f"需要合并的图片：{merge_order}")
+        keep_types.append("货尾")
+    keep_types += [f"{m} 月" for m in months]
+    await table.evaluate(
+        """
+            (table, types) => {
+                const kept = types
+                    .map(type => table.querySelector(`tbody[data-type="${type}"]`))
+                    .filter(el => el);
+                table.querySelectorAll("tbody, tfoot").forEach(el => {
+                    el.style.display = "none";
+                });
+                kept.forEach(el => {
+                    el.style.display = "";
+                    table.appendChild(el);
+                });
+            }
+        """,
+        arg=keep_types,
+    )
+    logging.info(f"需要截取的数据：{keep_types}")
 
-    # 合并图片
-    save_name = f"{report}_{now.strftime('%Y-%m-%d')}"
-    full_img_path = __merge_images(merge_order, save_name, output_dir=temp_dir)
-    logging.info(f"图片合并完成，保存路径: {full_img_path}")
+    img_path = os.path.join(temp_dir, f"{report}_{now.strftime('%Y-%m-%d')}.png")
+    await table.screenshot(path=img_path)
+    logging.info(f"已截取数据表格：{img_path}")
 
-    return full_img_path
+    return img_path
+
+
+async def __tbody_types(page: Page) -> Set[str]:
+    """一次性获取表格中已有的 tbody 类型（如「延期出货」「3 月」）"""
+    return set(
+        await page.eval_on_selector_all(
+            "tbody[data-type]", "els => els.map(el => el.dataset.type)"
+        )
+    )
 
 
-def __append_blank_month_tbody(locator: Locator, thead_month: str | int):
+async def __append_blank_month_tbody(locator: Locator, thead_month: str | int):
     """添加空白的月份数据"""
     tbody = f"""
             <tbody data-type="{thead_month} 月">
@@ -245,7 +427,7 @@ def __append_blank_month_tbody(locator: Locator, thead_month: str | int):
             </tbody>
         """
 
-    locator.evaluate(
+    await locator.evaluate(
         """
             (element, html) => {
                 element.insertAdjacentHTML('beforeend', html);
@@ -255,44 +437,28 @@ def __append_blank_month_tbody(locator: Locator, thead_month: str | int):
     )
 
 
-def __merge_images(
-    img_paths: List[str],
-    output_name: str,
-    background: tuple = (255, 255, 255),
-    output_dir: Optional[str] = None,
-) -> str:
-    """合并多张图片"""
-    # 打开所有图片
-    images = [Image.open(img_path) for img_path in img_paths]
-
-    # 获取图片尺寸
-    widths = [img.size[0] for img in images]
-    heights = [img.size[1] for img in images]
-
-    # 计算最大宽度和总高度
-    max_width = max(widths)
-    total_height = sum(heights)
-
-    # 创建新空白图片
-    new_img = Image.new("RGB", (max_width, total_height), background)
-
-    # 粘贴图片到新图片
-    y_offset = 0
-    for img in images:
-        x_offset = (max_width - img.width) // 2
-        new_img.paste(img, (x_offset, y_offset))
-        y_offset += img.height
-
-    # 保存新图片
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-        save_path = os.path.join(output_dir, f"{output_name}.png")
-    else:
-        save_path = f"{output_name}.png"
+def __build_attachment(path: str) -> MIMEBase:
+    """分块读取文件并编码为 base64 附件，避免整个文件及其副本同时驻留内存"""
+    with open(path, "rb") as file:
+        payload = "".join(
+            base64.encodebytes(chunk).decode("ascii")
+            for chunk in iter(lambda: file.read(ATTACHMENT_CHUNK_SIZE), b"")
+        )
+
+    attachment = MIMEBase("application", "octet-stream", Name=os.path.basename(path))
+    attachment.set_payload(payload)
+    attachment["Content-Transfer-Encoding"] = "base64"
+    return attachment
 
-    new_img.save(save_path, quality=95)
 
-    return save_path
+@contextmanager
+def smtp_session(
+    smtp_host: str, smtp_port: int, smtp_user: str, smtp_pass: str
+) -> Iterator[smtplib.SMTP_SSL]:
+    """打开 SMTP 会话，登录一次后可连续发送多封邮件，退出时自动断开"""
+    with smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=30) as server:
+        server.login(smtp_user, smtp_pass)
+        yield server
 
 
 def send_report_email(
@@ -305,11 +471,14 @@ def send_report_email(
     smtp_to: str,
 ) -> None:
     """发送报表邮件"""
-    today = datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d")
+    today = datetime.now(SH_TZ).strftime("%Y-%m-%d")
 
     # 打包图片
     zip_path = os.path.join(temp_dir, f"每日截图-打包-{today}.zip")
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+    # 图片本身已压缩，使用最快的压缩级别即可
+    with zipfile.ZipFile(
+        zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as zipf:
         for result_img_path in img_paths:
             if os.path.exists(result_img_path):
                 filename = os.path.basename(result_img_path)
@@ -330,14 +499,10 @@ def send_report_email(
     """
     message.attach(MIMEText(body, "html"))
     if os.path.exists(zip_path):
-        with open(zip_path, "rb") as file:
-            filename = os.path.basename(zip_path)
-            message.attach(MIMEApplication(file.read(), Name=filename))
+        message.attach(__build_attachment(zip_path))
 
-    with smtplib.SMTP_SSL(smtp_host, smtp_port) as server:
-        server.login(smtp_from, smtp_pass)
+    with smtp_session(smtp_host, smtp_port, smtp_from, smtp_pass) as server:
         server.sendmail(smtp_from, [smtp_to], message.as_string())
-        server.quit()
 
 
 if __name__ == "__main__":
@@ -353,12 +518,20 @@ if __name__ == "__main__":
     os.makedirs(temp_dir, exist_ok=True)
     logging.info(f"已清理并创建临时目录: {temp_dir}")
 
+    # 确定浏览器用户目录（不随临时目录清理，以便复用登录态）
+    profile_dir = args.profile_dir or os.path.join(
+        CURRENT_PATH, "temp", "send_daily_report_profile"
+    )
+
     # 截取图片
-    images = screenshot(
-        base_url=args.base_url,
-        username=args.username,
-        password=args.password,
-        temp_dir=temp_dir,
+    images = asyncio.run(
+        screenshot(
+            base_url=args.base_url,
+            username=args.username,
+            password=args.password,
+            temp_dir=temp_dir,
+            profile_dir=profile_dir,
+        )
     )
     logging.info(f"图片截取完成，共{len(images)}张")
 
@@ -1,20 +1,42 @@
 from __future__ import annotations
 
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import batched
 import logging
 import re
-from typing import Optional
+from typing import Iterator, Optional
 from zoneinfo import ZoneInfo
 
-import pymysql
+import MySQLdb
+import MySQLdb.connections
+import MySQLdb.cursors
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
-type PyMysqlConn = pymysql.Connection[pymysql.cursors.DictCursor]
+type PyMysqlConn = MySQLdb.connections.Connection
+
+# 业务时间使用的时区
+SH_TZ = ZoneInfo("Asia/Shanghai")
+
+# 订单号匹配规则：带有 -数字-数字 后缀的订单号（只取主体部分）、普通订单号
+_PAT_WITH_SUFFIX = re.compile(r"[A-Z]+[A-Z0-9-]*(?=-[0-9]-[0-9])")
+_PAT_NORMAL = re.compile(r"[A-Z]+[A-Z0-9-]*")
+
+# 没有条码时的数量和摘要（n 总数、d 去重数、h 异或摘要、s 求和摘要）
+EMPTY_DIGEST = {"n": 0, "d": 0, "h": 0, "s": 0}
+
+# 流式读取条码生成记录时每批比对的记录数
+SCAN_BATCH_SIZE = 500
+
+# 批量插入时每条语句的最大行数，避免超出 max_allowed_packet
+INSERT_CHUNK_SIZE = 500
 
 
 def get_mes_conn(
@@ -27,14 +49,14 @@ def get_mes_conn(
 ) -> PyMysqlConn:
     """获取 MES 数据库连接"""
     try:
-        conn = pymysql.connect(
+        conn = MySQLdb.connect(
             host=host,
             port=port,
             user=user,
             password=password,
             database=database,
             charset="utf8mb4",
-            cursorclass=pymysql.cursors.DictCursor,
+            cursorclass=MySQLdb.cursors.DictCursor,
             autocommit=autocommit,
         )
         return conn
@@ -53,14 +75,14 @@ def get_plus_conn(
 ) -> PyMysqlConn:
     """获取 PLUS 数据库连接"""
     try:
-        conn = pymysql.connect(
+        conn = MySQLdb.connect(
             host=host,
             port=port,
             user=user,
             password=password,
             database=database,
             charset="utf8mb4",
-            cursorclass=pymysql.cursors.DictCursor,
+            cursorclass=MySQLdb.cursors.DictCursor,
             autocommit=autocommit,
         )
         return conn
@@ -69,8 +91,34 @@ def get_plus_conn(
         raise e
 
 
-def query_mes_recently_barcode_creations(conn: PyMysqlConn) -> list[dict]:
-    """获取近期更新的条码生成记录"""
+def __placeholders(values: list) -> str:
+    """生成 IN 列表的参数占位符"""
+    return ", ".join(["%s"] * len(values))
+
+
+def __group_by(rows: list[dict], key: str) -> dict:
+    """按指定字段对查询结果分组"""
+    groups: dict = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def __order_key(order_code: str) -> str:
+    """按 MySQL 的比较规则（忽略尾部空格、不区分大小写）归一化销售订单，用作字典键"""
+    return order_code.rstrip(" ").lower()
+
+
+def __group_by_order(rows: list[dict]) -> dict[str, list[dict]]:
+    """按归一化后的销售订单对查询结果分组"""
+    groups: dict = {}
+    for row in rows:
+        groups.setdefault(__order_key(row["order_code"]), []).append(row)
+    return groups
+
+
+def query_mes_recently_barcode_creations(conn: PyMysqlConn) -> Iterator[dict]:
+    """获取近期更新的条码生成记录（服务端游标，逐行返回）"""
     sql = """
     SELECT
         t1.bc_id,
@@ -88,92 +136,168 @@ def query_mes_recently_barcode_creations(conn: PyMysqlConn) -> list[dict]:
     ORDER BY
         t1.last_update_date DESC
     """
-    start_date = datetime.now(ZoneInfo("Asia/Shanghai")) - timedelta(days=2)
-    stop_date = datetime.now(ZoneInfo("Asia/Shanghai")) + timedelta(days=1)
+    now = datetime.now(SH_TZ)
+    start_date = now - timedelta(days=2)
+    stop_date = now + timedelta(days=1)
 
-    with conn.cursor() as cursor:
+    with conn.cursor(MySQLdb.cursors.SSDictCursor) as cursor:
+        # 逐行处理期间服务端需等待客户端读取，放宽写超时
+        cursor.execute("SET SESSION net_write_timeout = 600")
         cursor.execute(sql, (start_date, stop_date))
-        return list(cursor.fetchall())
+        yield from cursor
 
 
-def query_mes_barcode_creation_barcodes(conn: PyMysqlConn, bc_id: int) -> list[dict]:
-    """查询条码生成记录下的条码列表"""
-    sql = """
+def query_mes_barcode_digests(conn: PyMysqlConn, bc_ids: list[int]) -> dict[int, dict]:
+    """批量查询条码生成记录下条码的数量和摘要，按 bc_id 分组"""
+    if not bc_ids:
+        return {}
+
+    sql = f"""
+    SELECT
+        bc_id,
+        COUNT(*) AS n,
+        COUNT(DISTINCT `code`) AS d,
+        BIT_XOR(CRC32(`code`)) AS h,
+        SUM(CRC32(`code`)) AS s
+    FROM
+        jgmes_barcode_data
+    WHERE
+        bc_id IN ({__placeholders(bc_ids)})
+        AND delete_flag = 0
+    GROUP BY
+        bc_id
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(sql, bc_ids)
+        return {row["bc_id"]: row for row in cursor.fetchall()}
+
+
+def query_mes_barcode_creations_barcodes(
+    conn: PyMysqlConn, bc_ids: list[int]
+) -> dict[int, list[dict]]:
+    """批量查询条码生成记录下的条码列表，按 bc_id 分组"""
+    if not bc_ids:
+        return {}
+
+    sql = f"""
     SELECT
+        bc_id,
         bd_id,
         `code`
     FROM
         jgmes_barcode_data
     WHERE
-        bc_id = %s
-        AND delete_flag = 0        
+        bc_id IN ({__placeholders(bc_ids)})
+        AND delete_flag = 0
     """
     with conn.cursor() as cursor:
-        cursor.execute(sql, (bc_id,))
-        return list(cursor.fetchall())
+        cursor.execute(sql, bc_ids)
+        return __group_by(cursor.fetchall(), "bc_id")
 
 
 def __extract_order_number(order: str) -> str:
     """从输入字符串中提取正确的订单号"""
 
     # 第一优先级：匹配带有 -数字-数字 后缀的订单号，只取主体部分
-    pattern_with_suffix = r"[A-Z]+[A-Z0-9-]*(?=-[0-9]-[0-9])"
-    match = re.search(pattern_with_suffix, order)
+    match = _PAT_WITH_SUFFIX.search(order)
     if match:
         return match.group(0)
 
     # 第二优先级：普通订单号（无特定后缀）
-    pattern_normal = r"[A-Z]+[A-Z0-9-]*"
-    match = re.search(pattern_normal, order)
+    match = _PAT_NORMAL.search(order)
     if match:
         return match.group(0)
 
     return order
 
 
-def query_plus_imported_barcodes(conn: PyMysqlConn, order_code: str) -> list[dict]:
-    """查询 PLUS 已导入的条码列表"""
-    sql = """
+def query_plus_imported_digests(
+    conn: PyMysqlConn, order_codes: list[str]
+) -> dict[str, dict]:
+    """批量查询 PLUS 已导入条码的数量和摘要，按归一化后的销售订单分组"""
+    if not order_codes:
+        return {}
+
+    sql = f"""
+    SELECT
+        `销售订单` AS `order_code`,
+        COUNT(*) AS n,
+        COUNT(DISTINCT `SN码`) AS d,
+        BIT_XOR(CRC32(`SN码`)) AS h,
+        SUM(CRC32(`SN码`)) AS s
+    FROM
+        `物料扫码-SN库`
+    WHERE
+        `销售订单` IN ({__placeholders(order_codes)})
+    GROUP BY
+        `销售订单`;
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(sql, order_codes)
+        return {__order_key(row["order_code"]): row for row in cursor.fetchall()}
+
+
+def query_plus_imported_barcodes(
+    conn: PyMysqlConn, order_codes: list[str]
+) -> dict[str, list[dict]]:
+    """批量查询 PLUS 已导入的条码列表，按归一化后的销售订单分组"""
+    if not order_codes:
+        return {}
+
+    sql = f"""
     SELECT
+        `销售订单` AS `order_code`,
         `SN码` AS `code`
     FROM
         `物料扫码-SN库`
     WHERE
-        `销售订单` = %s;
+        `销售订单` IN ({__placeholders(order_codes)});
     """
     with conn.cursor() as cursor:
-        cursor.execute(sql, (order_code,))
-        return list(cursor.fetchall())
+        cursor.execute(sql, order_codes)
+        return __group_by_order(cursor.fetchall())
 
 
-def query_plus_incoming_barcodes(conn: PyMysqlConn, order_code: str) -> list[dict]:
-    """查询 PLUS 已入库的条码列表"""
-    sql = """
+def query_plus_incoming_barcodes(
+    conn: PyMysqlConn, order_codes: list[str]
+) -> dict[str, list[dict]]:
+    """批量查询 PLUS 已入库的条码列表，按归一化后的销售订单分组"""
+    if not order_codes:
+        return {}
+
+    sql = f"""
     SELECT
+        `销售订单` AS `order_code`,
         `SN码` AS `code`
     FROM
         `物料扫码-库存`
     WHERE
-        `销售订单` = %s;
+        `销售订单` IN ({__placeholders(order_codes)});
     """
     with conn.cursor() as cursor:
-        cursor.execute(sql, (order_code,))
-        return list(cursor.fetchall())
+        cursor.execute(sql, order_codes)
+        return __group_by_order(cursor.fetchall())
 
 
-def query_plus_outgoing_barcodes(conn: PyMysqlConn, order_code: str) -> list[dict]:
-    """查询 PLUS 已出库的条码列表"""
-    sql = """
+def query_plus_outgoing_barcodes(
+    conn: PyMysqlConn, order_codes: list[str]
+) -> dict[str, list[dict]]:
+    """批量查询 PLUS 已出库的条码列表，按归一化后的销售订单分组"""
+    if not order_codes:
+        return {}
+
+    sql = f"""
     SELECT
+        `销售订单` AS `order_code`,
         `SN码` AS `code`
     FROM
         `物料扫码-出库`
     WHERE
-        `销售订单` = %s;
+        `销售订单` IN ({__placeholders(order_codes)});
     """
     with conn.cursor() as cursor:
-        cursor.execute(sql, (order_code,))
-        return list(cursor.fetchall())
+        cursor.execute(sql, order_codes)
+        return __group_by_order(cursor.fetchall())
 
 
 def delete_plus_imported_barcodes(conn: PyMysqlConn, order_code: str) -> int:
@@ -192,19 +316,169 @@ def delete_plus_imported_barcodes(conn: PyMysqlConn, order_code: str) -> int:
 def insert_plus_barcodes(
     conn: PyMysqlConn, order_code: str, item_code: str, barcodes: list[dict]
 ) -> int:
-    """插入 PLUS 条码列表"""
-    sql = """
-    INSERT INTO `物料扫码-SN库` (`销售订单`, `物料编码`, `SN码`, `导入来源`, `录入人`, `录入时间`)
-    VALUES (%s, %s, %s, %s, %s, %s)
-    """
-    now = datetime.now(ZoneInfo("Asia/Shanghai")).strftime("%Y-%m-%d %H:%M:%S")
-    params = [
-        (order_code, item_code, barcode["code"], "机器人", "机器人", now)
-        for barcode in barcodes
-    ]
+    """插入 PLUS 条码列表（按批拼接多行 VALUES，每批一次往返）"""
+    now = datetime.now(SH_TZ).replace(microsecond=0)
+    count = 0
     with conn.cursor() as cursor:
-        cursor.executemany(sql, params)
-        return cursor.rowcount
+        for i in range(0, len(barcodes), INSERT_CHUNK_SIZE):
+            chunk = barcodes[i : i + INSERT_CHUNK_SIZE]
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(chunk))
+            sql = f"""
+            INSERT INTO `物料扫码-SN库` (`销售订单`, `物料编码`, `SN码`, `导入来源`, `录入人`, `录入时间`)
+            VALUES {placeholders}
+            """
+            params = [
+                value
+                for barcode in chunk
+                for value in (
+                    order_code,
+                    item_code,
+                    barcode["code"],
+                    "机器人",
+                    "机器人",
+                    now,
+                )
+            ]
+            cursor.execute(sql, params)
+            count += cursor.rowcount
+    return count
+
+
+def sync_barcode_creations(
+    mes_conn: PyMysqlConn,
+    plus_conn: PyMysqlConn,
+    plus_incoming_conn: PyMysqlConn,
+    plus_outgoing_conn: PyMysqlConn,
+    barcode_creations: list[dict],
+) -> None:
+    """比对一批条码生成记录，并将 MES 重新导入的条码同步到 PLUS"""
+    # 先比对两边条码的数量和摘要，只有不一致的记录才查询完整条码列表
+    order_codes = list(
+        {__extract_order_number(row["order_code"]) for row in barcode_creations}
+    )
+    order_key_counts = Counter(
+        __order_key(__extract_order_number(row["order_code"]))
+        for row in barcode_creations
+    )
+    # 两边的摘要互不依赖，在各自的连接上并发查询
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        mes_digests_future = executor.submit(
+            query_mes_barcode_digests,
+            mes_conn,
+            [row["bc_id"] for row in barcode_creations],
+        )
+        plus_digests_future = executor.submit(
+            query_plus_imported_digests, plus_conn, order_codes
+        )
+        mes_digests = mes_digests_future.result()
+        plus_digests = plus_digests_future.result()
+
+    candidates = []
+    for barcode_creation in barcode_creations:
+        order_code = __extract_order_number(barcode_creation["order_code"])
+        logging.info(f"正在比对: {barcode_creation['task_code']} - {order_code}")
+
+        # 同一订单有多条记录时，前面的重新导入会改变 PLUS 数据，需逐条完整比对
+        if order_key_counts[__order_key(order_code)] == 1:
+            mes_digest = mes_digests.get(barcode_creation["bc_id"], EMPTY_DIGEST)
+            plus_digest = plus_digests.get(__order_key(order_code), EMPTY_DIGEST)
+            logging.info(
+                f"MES 导入的条码: {mes_digest['n']} 条，"
+                f"PLUS 已导入的条码: {plus_digest['n']} 条"
+            )
+
+            # 检查数量是否一致，不一致则跳过
+            if mes_digest["n"] != plus_digest["n"]:
+                logging.warning("两边的条码数量不一致，跳过不处理")
+                continue
+
+            # 检查两边的条码摘要是否全部一致，一致则跳过（异或会抵消重复条码，需同时比对去重数和求和）
+            if all(mes_digest[k] == plus_digest[k] for k in ("d", "h", "s")):
+                logging.warning("两边的条码内容一致，跳过不处理")
+                continue
+
+        candidates.append((barcode_creation, order_code))
+    logging.info(f"需要完整比对的条码生成记录: {len(candidates)} 条")
+
+    # 一次性查询候选记录涉及的条码，避免逐条查询；四个查询互不依赖，并发执行
+    bc_ids = [barcode_creation["bc_id"] for barcode_creation, _ in candidates]
+    order_codes = list({order_code for _, order_code in candidates})
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(query_mes_barcode_creations_barcodes, mes_conn, bc_ids),
+            executor.submit(query_plus_imported_barcodes, plus_conn, order_codes),
+            executor.submit(
+                query_plus_incoming_barcodes, plus_incoming_conn, order_codes
+            ),
+            executor.submit(
+                query_plus_outgoing_barcodes, plus_outgoing_conn, order_codes
+            ),
+        ]
+        (
+            mes_barcodes_by_bc_id,
+            plus_imported_by_order,
+            plus_incoming_by_order,
+            plus_outgoing_by_order,
+        ) = [future.result() for future in futures]
+
+    # 遍历需要完整比对的条码生成记录
+    for barcode_creation, order_code in candidates:
+        logging.info(f"正在处理: {barcode_creation['task_code']} - {order_code}")
+
+        # 查询导入的条码列表
+        mes_barcodes = mes_barcodes_by_bc_id.get(barcode_creation["bc_id"], [])
+        mes_codes = [code["code"] for code in mes_barcodes]
+        logging.info(f"MES 导入的条码列表: {len(mes_codes)} 条")
+
+        # 查询 PLUS 已导入的条码列表
+        plus_barcodes = plus_imported_by_order.get(__order_key(order_code), [])
+        plus_codes = [code["code"] for code in plus_barcodes]
+        logging.info(f"PLUS 已导入的条码列表: {len(plus_codes)} 条")
+
+        # 检查数量是否一致，不一致则跳过
+        if len(mes_codes) != len(plus_codes):
+            logging.warning("两边的条码数量不一致，跳过不处理")
+            continue
+
+        # 检查两边的条码是否一致，一致则跳过
+        if set(mes_codes) == set(plus_codes):
+            logging.warning("两边的条码内容一致，跳过不处理")
+            continue
+
+        # 查询 PLUS 已入/出库的条码列表
+        plus_incoming_barcodes = plus_incoming_by_order.get(__order_key(order_code))
+        plus_outgoing_barcodes = plus_outgoing_by_order.get(__order_key(order_code))
+        if plus_incoming_barcodes or plus_outgoing_barcodes:
+            logging.warning("已存在已入/出库的条码，跳过不处理")
+            continue
+
+        # 更新 PLUS 已导入的条码（在同一事务内删除后重新插入）
+        plus_conn.begin()
+        try:
+            # 删除 PLUS 已导入的条码
+            delete_count = delete_plus_imported_barcodes(plus_conn, order_code)
+            logging.info(f"删除 PLUS 已导入的条码: {delete_count} 条")
+
+            # 插入 PLUS 条码列表
+            insert_count = insert_plus_barcodes(
+                plus_conn,
+                order_code,
+                barcode_creation["inv_code"],
+                mes_barcodes,
+            )
+            logging.info(f"插入 PLUS 条码列表: {insert_count} 条")
+
+            plus_conn.commit()
+            logging.info("重新导入成功")
+
+            # 同步内存中的已导入条码，供同一订单的后续记录比对
+            plus_imported_by_order[__order_key(order_code)] = [
+                {"order_code": order_code, "code": code} for code in mes_codes
+            ]
+        except Exception as e:
+            logging.error(f"重新导入失败，回退事务: {e}")
+            plus_conn.rollback()
+            raise e
 
 
 def parse_args():
@@ -233,7 +507,10 @@ if __name__ == "__main__":
     args = parse_args()
 
     mes_conn: Optional[PyMysqlConn] = None
+    mes_scan_conn: Optional[PyMysqlConn] = None
     plus_conn: Optional[PyMysqlConn] = None
+    plus_incoming_conn: Optional[PyMysqlConn] = None
+    plus_outgoing_conn: Optional[PyMysqlConn] = None
     try:
         # 连接数据库
         mes_conn = get_mes_conn(
@@ -244,84 +521,42 @@ if __name__ == "__main__":
             database=args.mes_name,
         )
         logging.info("连接 MES 数据库成功")
-        plus_conn = get_plus_conn(
+        connect_plus = partial(
+            get_plus_conn,
             host=args.plus_host,
             port=args.plus_port,
             user=args.plus_user,
             password=args.plus_pass,
             database=args.plus_name,
         )
+        plus_conn = connect_plus()
+        # 入/出库条码与已导入条码并发查询，各占一个连接
+        plus_incoming_conn = connect_plus()
+        plus_outgoing_conn = connect_plus()
         logging.info("连接 PLUS 数据库成功")
 
-        # 获取近期更新的条码生成记录
-        barcode_creations = query_mes_recently_barcode_creations(mes_conn)
-        logging.info(f"近期更新的条码生成记录: {len(barcode_creations)} 条")
-
-        # 遍历近期更新的条码生成记录
-        for barcode_creation in barcode_creations:
-            order_code = __extract_order_number(barcode_creation["order_code"])
-            logging.info(f"正在处理: {barcode_creation['task_code']} - {order_code}")
-
-            # 查询导入的条码列表
-            mes_barcodes = query_mes_barcode_creation_barcodes(
-                mes_conn, barcode_creation["bc_id"]
-            )
-            mes_codes = [code["code"] for code in mes_barcodes]
-            logging.info(f"MES 导入的条码列表: {len(mes_codes)} 条")
-
-            # 查询 PLUS 已导入的条码列表
-            plus_barcodes = query_plus_imported_barcodes(plus_conn, order_code)
-            plus_codes = [code["code"] for code in plus_barcodes]
-            logging.info(f"PLUS 已导入的条码列表: {len(plus_codes)} 条")
-
-            # 检查数量是否一致，不一致则跳过
-            if len(mes_codes) != len(plus_codes):
-                logging.warning("两边的条码数量不一致，跳过不处理")
-                continue
-
-            # 检查两边的条码是否一致，一致则跳过
-            if set(mes_codes) == set(plus_codes):
-                logging.warning("两边的条码内容一致，跳过不处理")
-                continue
-
-            # 查询 PLUS 已入/出库的条码列表
-            plus_incoming_barcodes = query_plus_incoming_barcodes(plus_conn, order_code)
-            plus_outgoing_barcodes = query_plus_outgoing_barcodes(plus_conn, order_code)
-            if plus_incoming_barcodes or plus_outgoing_barcodes:
-                logging.warning("已存在已入/出库的条码，跳过不处理")
-                continue
-
-            # 更新 PLUS 已导入的条码
-            plus_txn_conn = get_plus_conn(
-                host=args.plus_host,
-                port=args.plus_port,
-                user=args.plus_user,
-                password=args.plus_pass,
-                database=args.plus_name,
-                autocommit=False,
+        # 流式读取近期更新的条码生成记录（独占一个连接），按批比对并同步
+        mes_scan_conn = get_mes_conn(
+            host=args.mes_host,
+            port=args.mes_port,
+            user=args.mes_user,
+            password=args.mes_pass,
+            database=args.mes_name,
+        )
+        total = 0
+        for batch in batched(
+            query_mes_recently_barcode_creations(mes_scan_conn), SCAN_BATCH_SIZE
+        ):
+            total += len(batch)
+            logging.info(f"本批条码生成记录: {len(batch)} 条")
+            sync_barcode_creations(
+                mes_conn,
+                plus_conn,
+                plus_incoming_conn,
+                plus_outgoing_conn,
+                list(batch),
             )
-            try:
-                # 删除 PLUS 已导入的条码
-                delete_count = delete_plus_imported_barcodes(plus_txn_conn, order_code)
-                logging.info(f"删除 PLUS 已导入的条码: {delete_count} 条")
-
-                # 插入 PLUS 条码列表
-                insert_count = insert_plus_barcodes(
-                    plus_txn_conn,
-                    order_code,
-                    barcode_creation["inv_code"],
-                    mes_barcodes,
-                )
-                logging.info(f"插入 PLUS 条码列表: {insert_count} 条")
-
-                plus_txn_conn.commit()
-                logging.info("重新导入成功")
-            except Exception as e:
-                logging.error(f"重新导入失败，回退事务: {e}")
-                raise e
-            finally:
-                if plus_txn_conn:
-                    plus_txn_conn.close()
+        logging.info(f"近期更新的条码生成记录: {total} 条")
 
     except Exception as e:
         logging.error(f"处理失败: {e}")
@@ -329,5 +564,11 @@ if __name__ == "__main__":
     finally:
         if mes_conn:
             mes_conn.close()
+        if mes_scan_conn:
+            mes_scan_conn.close()
         if plus_conn:
             plus_conn.close()
+        if plus_incoming_conn:
+            plus_incoming_conn.close()
+        if plus_outgoing_conn:
+            plus_outgoing_conn.close()